@@ -0,0 +1,207 @@
+import asyncio
+import json
+import math
+from collections import deque
+from dataclasses import dataclass, field
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+# bcrypt-bound endpoints; everything else is classed by HTTP method.
+AUTH_PATHS = {"/auth/register", "/auth/login", "/api/token"}
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Read-only endpoints that take their input as a POST body.
+READ_PATHS = {"/api/users/batch"}
+# Never queued or shed, so overload stays observable.
+EXEMPT_PATHS = {"/api/metrics"}
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
+@dataclass
+class RouteClass:
+    name: str
+    concurrency: int
+    queue_size: int
+    timeout: float
+    in_flight: int = 0
+    admitted: int = 0
+    shed_queue_full: int = 0
+    shed_timeout: int = 0
+    waiters: deque = field(default_factory=deque)
+
+    def snapshot(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "inFlight": self.in_flight,
+            "queueDepth": len(self.waiters),
+            "admitted": self.admitted,
+            "shedQueueFull": self.shed_queue_full,
+            "shedTimeout": self.shed_timeout,
+        }
+
+
+class AdmissionController:
+    """
+    Concurrency limits per route class under one overall limit.
+
+    Each class has its own bounded FIFO wait queue and queue-time deadline.
+    When a slot frees up, waiters are woken in class order, so cheap reads
+    are admitted ahead of writes and bcrypt-heavy auth calls.
+    """
+
+    def __init__(self, classes: list[RouteClass], total_limit: int):
+        self.classes = {route_class.name: route_class for route_class in classes}
+        self.total_limit = total_limit
+        self.in_flight = 0
+
+    def _has_capacity(self, route_class: RouteClass) -> bool:
+        return (
+            route_class.in_flight < route_class.concurrency
+            and self.in_flight < self.total_limit
+        )
+
+    def _admit(self, route_class: RouteClass) -> None:
+        route_class.in_flight += 1
+        route_class.admitted += 1
+        self.in_flight += 1
+
+    async def acquire(self, name: str) -> None:
+        route_class = self.classes[name]
+        if not route_class.waiters and self._has_capacity(route_class):
+            self._admit(route_class)
+            return
+        if len(route_class.waiters) >= route_class.queue_size:
+            route_class.shed_queue_full += 1
+            raise Overloaded("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, route_class.timeout)
+        except TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted in the same tick the deadline fired (wait_for still
+                # raises on 3.12+); the slot is already ours.
+                return
+            self._discard(route_class, waiter)
+            route_class.shed_timeout += 1
+            raise Overloaded("timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            else:
+                self._discard(route_class, waiter)
+            raise
+
+    def release(self, name: str) -> None:
+        route_class = self.classes[name]
+        route_class.in_flight -= 1
+        self.in_flight -= 1
+        self._wake()
+
+    def _discard(self, route_class: RouteClass, waiter: asyncio.Future) -> None:
+        try:
+            route_class.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _wake(self) -> None:
+        for route_class in self.classes.values():
+            while route_class.waiters and self._has_capacity(route_class):
+                waiter = route_class.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._admit(route_class)
+                waiter.set_result(None)
+
+    def snapshot(self) -> dict:
+        return {
+            "inFlight": self.in_flight,
+            "totalLimit": self.total_limit,
+            "classes": {
+                name: route_class.snapshot()
+                for name, route_class in self.classes.items()
+            },
+        }
+
+
+def classify(method: str, path: str) -> str:
+    if path in AUTH_PATHS:
+        return "auth"
+    if method in READ_METHODS or path in READ_PATHS:
+        return "read"
+    return "write"
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        name = classify(scope["method"], scope["path"])
+        try:
+            await self.controller.acquire(name)
+        except Overloaded:
+            await self._shed(name, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+    async def _shed(self, name: str, send: Send) -> None:
+        retry_after = math.ceil(self.controller.classes[name].timeout) or 1
+        body = json.dumps(
+            {
+                "status": "error",
+                "message": "Service is temporarily overloaded, please retry",
+                "statusCode": 503,
+            }
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+# Order matters: earlier classes are woken first when capacity frees up.
+admission_controller = AdmissionController(
+    [
+        RouteClass(
+            "read",
+            settings.ADMISSION_READ_CONCURRENCY,
+            settings.ADMISSION_READ_QUEUE_SIZE,
+            settings.ADMISSION_READ_TIMEOUT_SECONDS,
+        ),
+        RouteClass(
+            "write",
+            settings.ADMISSION_WRITE_CONCURRENCY,
+            settings.ADMISSION_WRITE_QUEUE_SIZE,
+            settings.ADMISSION_WRITE_TIMEOUT_SECONDS,
+        ),
+        RouteClass(
+            "auth",
+            settings.ADMISSION_AUTH_CONCURRENCY,
+            settings.ADMISSION_AUTH_QUEUE_SIZE,
+            settings.ADMISSION_AUTH_TIMEOUT_SECONDS,
+        ),
+    ],
+    total_limit=settings.ADMISSION_TOTAL_CONCURRENCY,
+)
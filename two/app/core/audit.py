@@ -0,0 +1,188 @@
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler
+from time import perf_counter
+from typing import Any, TextIO
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+access_logger = logging.getLogger("app.access")
+audit_logger = logging.getLogger("app.audit")
+
+_STOP = object()
+
+
+def audit(event: str, **fields: Any) -> None:
+    """Record an audit event such as a login or a membership change."""
+    audit_logger.info(event, extra={"fields": {"event": event, **fields}})
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        return json.dumps(payload, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hand records to a bounded queue without ever blocking the caller.
+
+    Records are passed through unformatted; formatting and I/O happen on the
+    writer thread. When the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingLogWriter(threading.Thread):
+    """Drain the log queue and write whatever is waiting in a single write."""
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        stream: TextIO,
+        formatter: logging.Formatter,
+        batch_size: int,
+    ):
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = log_queue
+        self.stream = stream
+        self.formatter = formatter
+        self.batch_size = batch_size
+
+    def run(self) -> None:
+        stopping = False
+        while not stopping:
+            record = self.queue.get()
+            if record is _STOP:
+                break
+            batch = [record]
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+            self.write(batch)
+
+    def write(self, batch: list[logging.LogRecord]) -> None:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                pass
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            pass
+
+    def stop(self) -> None:
+        self.queue.put(_STOP)
+        self.join()
+
+
+class StructuredLogging:
+    """Own the queue handler and writer thread for one worker."""
+
+    def __init__(self):
+        self.handler: DroppingQueueHandler | None = None
+        self.writer: BatchingLogWriter | None = None
+        self._stream: TextIO | None = None
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped if self.handler else 0
+
+    def start(self) -> None:
+        log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        if settings.LOG_FILE:
+            self._stream = open(settings.LOG_FILE, "a", encoding="utf-8")
+        stream = self._stream or sys.stdout
+        self.handler = DroppingQueueHandler(log_queue)
+        self.writer = BatchingLogWriter(
+            log_queue, stream, JsonFormatter(), settings.LOG_BATCH_SIZE
+        )
+        self.writer.start()
+        for logger in (access_logger, audit_logger):
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(self.handler)
+
+    def stop(self) -> None:
+        if self.handler is None:
+            return
+        for logger in (access_logger, audit_logger):
+            logger.removeHandler(self.handler)
+        self.writer.stop()
+        if self._stream is not None:
+            self._stream.close()
+        self.handler = self.writer = self._stream = None
+
+
+structured_logging = StructuredLogging()
+
+
+class AccessLogMiddleware:
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+        start = perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            client = scope.get("client")
+            access_logger.info(
+                "request",
+                extra={
+                    "fields": {
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "durationMs": round((perf_counter() - start) * 1000, 2),
+                        "client": client[0] if client else None,
+                        "sampleRate": self.sample_rate,
+                    }
+                },
+            )
@@ -1,17 +1,21 @@
 from datetime import UTC, datetime, timedelta
 from typing import Annotated, Any, Literal
+from uuid import uuid4
 
 import bcrypt
 from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from app.core.database import async_get_db
+from app.core.denylist import denylist, user_revocation_key
 from app.services.organisation.model import OrganisationUser
 
 from app.core.config import settings
-from app.services.user.model import User
+from app.services.user.model import RevokedToken, User
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
@@ -22,8 +26,9 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
-    correct_password: bool = bcrypt.checkpw(
-        plain_password.encode(), hashed_password.encode()
+    # bcrypt is deliberately slow; keep it off the event loop.
+    correct_password: bool = await run_in_threadpool(
+        bcrypt.checkpw, plain_password.encode(), hashed_password.encode()
     )
     return correct_password
 
@@ -48,13 +53,15 @@ async def create_access_token(
     data: dict[str, Any], expires_delta: timedelta | None = None
 ) -> str:
     to_encode = data.copy()
+    now = datetime.now(UTC)
     if expires_delta:
-        expire = datetime.now(UTC).replace(tzinfo=None) + expires_delta
+        expire = now.replace(tzinfo=None) + expires_delta
     else:
-        expire = datetime.now(UTC).replace(tzinfo=None) + timedelta(
+        expire = now.replace(tzinfo=None) + timedelta(
             minutes=ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode.update({"exp": expire})
+    # `iat` keeps sub-second precision so revoke-all cutoffs are exact.
+    to_encode.update({"exp": expire, "iat": now.timestamp(), "jti": str(uuid4())})
     encoded_jwt: str = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -86,6 +93,8 @@ async def get_current_user(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    if token_is_revoked(payload):
+        raise credentials_exception
     user = (
         (await db.execute(select(User).filter(User.email == email))).scalars().first()
     )
@@ -93,6 +102,73 @@ async def get_current_user(
         raise credentials_exception
     return user
 
+
+async def get_token_payload(
+    token: str = Depends(oauth2_scheme),
+    user: User = Depends(get_current_user),
+) -> dict[str, Any]:
+    # get_current_user has already validated the token and its revocation.
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def _timestamp(value: Any) -> datetime | None:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(float(value), UTC).replace(tzinfo=None)
+
+
+def token_is_revoked(payload: dict[str, Any]) -> bool:
+    # In-memory only; the denylist is refreshed in the background.
+    return denylist.is_revoked(
+        payload.get("jti"), payload.get("sub", ""), _timestamp(payload.get("iat"))
+    )
+
+
+async def revoke_token(payload: dict[str, Any], db: AsyncSession) -> None:
+    """Denylist a single token until its own expiry."""
+    jti = payload.get("jti")
+    if jti is None:
+        # Tokens issued before `jti` existed can only be revoked all at once.
+        await revoke_user_tokens(payload.get("sub", ""), db)
+        return
+    revoked = RevokedToken(
+        jti=jti, userId=payload.get("sub", ""), expiresAt=_timestamp(payload["exp"])
+    )
+    db.add(revoked)
+    await db.commit()
+    denylist.add(revoked.jti, revoked.revokedAt, revoked.expiresAt)
+
+
+async def revoke_user_tokens(userId: str, db: AsyncSession) -> None:
+    """Denylist every token issued to a user up to now."""
+    now = datetime.now(UTC).replace(tzinfo=None)
+    revoked = RevokedToken(
+        jti=user_revocation_key(userId),
+        userId=userId,
+        expiresAt=now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        revokedAt=now,
+    )
+    db.add(revoked)
+    await db.commit()
+    denylist.add(revoked.jti, revoked.revokedAt, revoked.expiresAt)
+
+async def visible_user_ids(
+    db: AsyncSession, user: User, userIds: list[str]
+) -> set[str]:
+    """Return which of `userIds` share at least one organisation with `user`."""
+    visible = {user.userId} & set(userIds)
+    current_user_orgs = aliased(OrganisationUser)
+    shared = (
+        await db.execute(
+            select(OrganisationUser.userId)
+            .join(current_user_orgs, current_user_orgs.orgId == OrganisationUser.orgId)
+            .filter(current_user_orgs.userId == user.userId)
+            .filter(OrganisationUser.userId.in_(userIds))
+            .distinct()
+        )
+    ).scalars().all()
+    return visible | set(shared)
+
 async def user_shares_organisation(
     db: Annotated[AsyncSession, Depends(async_get_db)],
     user: Annotated[User, Depends(get_current_user)],
@@ -100,20 +176,7 @@ async def user_shares_organisation(
 ) -> bool:
     if user.userId == userId:
         return True
-    user_orgs = (
-        await db.execute(
-            select(OrganisationUser).filter(OrganisationUser.userId == user.userId)
-        )
-    ).scalars().all()
-    org_ids = [org.orgId for org in user_orgs]
-    user_orgs = (
-        await db.execute(
-            select(OrganisationUser)
-            .filter(OrganisationUser.userId == userId)
-            .filter(OrganisationUser.orgId.in_(org_ids))
-        )
-    ).scalars().all()
-    return bool(user_orgs)
+    return userId in await visible_user_ids(db, user, [userId])
 
 async def user_belongs_in_organisation(
     db: Annotated[AsyncSession, Depends(async_get_db)],
@@ -10,6 +10,36 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    REVOCATION_REFRESH_SECONDS: float = 5.0
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+
+    MEMBERSHIP_WRITE_COALESCING: bool = False
+    MEMBERSHIP_COALESCE_WINDOW_MS: float = 5.0
+    MEMBERSHIP_COALESCE_MAX_BATCH: int = 100
+
+    ADMISSION_CONTROL: bool = True
+    # Keep the total near the database pool size (5 + 10 overflow by default).
+    ADMISSION_TOTAL_CONCURRENCY: int = 15
+    ADMISSION_READ_CONCURRENCY: int = 12
+    ADMISSION_READ_QUEUE_SIZE: int = 200
+    ADMISSION_READ_TIMEOUT_SECONDS: float = 1.0
+    ADMISSION_WRITE_CONCURRENCY: int = 8
+    ADMISSION_WRITE_QUEUE_SIZE: int = 100
+    ADMISSION_WRITE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_AUTH_CONCURRENCY: int = 4
+    ADMISSION_AUTH_QUEUE_SIZE: int = 50
+    ADMISSION_AUTH_TIMEOUT_SECONDS: float = 3.0
+
+    ACCESS_LOG: bool = True
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    # Empty writes JSON lines to stdout.
+    LOG_FILE: str = ""
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_BATCH_SIZE: int = 500
+
+    USER_BATCH_MAX_IDS: int = 100
+
 
 
     class Config:
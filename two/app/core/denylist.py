@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import UTC, datetime
+from time import monotonic
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.services.user.model import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+def user_revocation_key(userId: str) -> str:
+    """Denylist key used to revoke every token issued to a user before a cutoff."""
+    return f"user:{userId}"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys using double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class TokenDenylist:
+    """
+    Per-worker mirror of the `revoked_tokens` table.
+
+    Lookups hit the Bloom filter first, so a token that was never revoked is
+    rejected from the denylist without touching the exact set or the database.
+    The mirror is refreshed incrementally from rows with an id above the
+    highest one seen so far. Ids skipped below that cursor may belong to
+    transactions that commit late, so they are re-checked until `gap_seconds`
+    have passed. Entries are dropped once the token they cover has expired.
+    """
+
+    # Bound on re-checked ids, e.g. after rows were purged before first load.
+    max_gaps = 1000
+
+    def __init__(
+        self,
+        capacity: int = settings.REVOCATION_BLOOM_CAPACITY,
+        error_rate: float = settings.REVOCATION_BLOOM_ERROR_RATE,
+        refresh_seconds: float = settings.REVOCATION_REFRESH_SECONDS,
+        gap_seconds: float = 60.0,
+    ):
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self.gap_seconds = gap_seconds
+        self._bloom = BloomFilter(capacity, error_rate)
+        # key -> (revokedAt, expiresAt)
+        self._entries: dict[str, tuple[datetime, datetime]] = {}
+        self._cursor = 0
+        # skipped id -> monotonic deadline for it to show up
+        self._gaps: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: str, revoked_at: datetime, expires_at: datetime) -> None:
+        current = self._entries.get(key)
+        if current is not None and current[0] >= revoked_at:
+            return
+        self._entries[key] = (revoked_at, expires_at)
+        if len(self._entries) > self._bloom.capacity:
+            self._rebuild(self._bloom.capacity * 2)
+        else:
+            self._bloom.add(key)
+
+    def is_revoked(self, jti: str | None, userId: str, issued_at: datetime | None) -> bool:
+        now = datetime.now(UTC).replace(tzinfo=None)
+        if jti is not None and jti in self._bloom:
+            entry = self._entries.get(jti)
+            if entry is not None and entry[1] > now:
+                return True
+        key = user_revocation_key(userId)
+        if key in self._bloom:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                return issued_at is None or issued_at < entry[0]
+        return False
+
+    def prune(self) -> None:
+        now = datetime.now(UTC).replace(tzinfo=None)
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+        if not expired:
+            return
+        for key in expired:
+            del self._entries[key]
+        # Bloom filters cannot forget keys, so rebuild from what is left.
+        self._rebuild(self._bloom.capacity)
+
+    def _rebuild(self, capacity: int) -> None:
+        bloom = BloomFilter(max(capacity, len(self._entries)), self.error_rate)
+        for key in self._entries:
+            bloom.add(key)
+        self._bloom = bloom
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Pull rows added since the previous refresh and purge expired rows."""
+        now = datetime.now(UTC).replace(tzinfo=None)
+        newer = RevokedToken.id > self._cursor
+        if self._gaps:
+            newer = or_(newer, RevokedToken.id.in_(self._gaps))
+        rows = (
+            await db.execute(
+                select(RevokedToken).filter(RevokedToken.expiresAt > now).filter(newer)
+            )
+        ).scalars().all()
+        seen = set()
+        for row in rows:
+            self.add(row.jti, row.revokedAt, row.expiresAt)
+            seen.add(row.id)
+            self._gaps.pop(row.id, None)
+        self._track_gaps(seen)
+        await db.execute(delete(RevokedToken).filter(RevokedToken.expiresAt <= now))
+        await db.commit()
+        self.prune()
+
+    def _track_gaps(self, seen: set[int]) -> None:
+        clock = monotonic()
+        newest = max(seen, default=self._cursor)
+        if newest > self._cursor:
+            deadline = clock + self.gap_seconds
+            start = max(self._cursor + 1, newest - self.max_gaps)
+            for missing in range(start, newest):
+                if missing not in seen:
+                    self._gaps[missing] = deadline
+            self._cursor = newest
+        self._gaps = {
+            missing: deadline
+            for missing, deadline in self._gaps.items()
+            if deadline > clock
+        }
+        if len(self._gaps) > self.max_gaps:
+            self._gaps = dict(sorted(self._gaps.items())[-self.max_gaps:])
+
+    async def run(self, session_factory: sessionmaker) -> None:
+        """Refresh forever; started once per worker from the app lifespan."""
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Keep serving from the current mirror and retry next tick.
+                logger.exception("Failed to refresh token denylist")
+            await asyncio.sleep(self.refresh_seconds)
+
+
+denylist = TokenDenylist()
@@ -0,0 +1,25 @@
+import hashlib
+from typing import Any
+
+from fastapi import Response
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(
+        ":".join(str(part) for part in parts).encode(), digest_size=12
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
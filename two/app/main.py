@@ -1,11 +1,18 @@
+import asyncio
+from contextlib import suppress
+
 from fastapi import FastAPI, Request
 from fastapi.concurrency import asynccontextmanager
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi import status
+from app.core.admission import AdmissionMiddleware, admission_controller
+from app.core.audit import AccessLogMiddleware, structured_logging
 from app.core.config import settings
-from app.core.database import create_tables
+from app.core.database import create_tables, local_session
+from app.core.denylist import denylist
+from app.services.organisation.writer import membership_writer
 from app.services.user.route import router as user_router
 from app.services.organisation.route import router as org_router
 from sqlalchemy.exc import IntegrityError
@@ -13,14 +20,25 @@ from sqlalchemy.exc import IntegrityError
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    structured_logging.start()
     await create_tables()
+    refresher = asyncio.create_task(denylist.run(local_session))
     yield
+    refresher.cancel()
+    with suppress(asyncio.CancelledError):
+        await refresher
+    await membership_writer.close()
+    structured_logging.stop()
 
 
 def get_application():
     _app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
     _app.include_router(user_router)
     _app.include_router(org_router)
+    if settings.ADMISSION_CONTROL:
+        _app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+    if settings.ACCESS_LOG:
+        _app.add_middleware(AccessLogMiddleware, sample_rate=settings.ACCESS_LOG_SAMPLE_RATE)
     _app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -35,6 +53,16 @@ def get_application():
 app = get_application()
 
 
+@app.get("/api/metrics", tags=["metrics"])
+async def metrics():
+    return {
+        "admission": admission_controller.snapshot(),
+        "membershipWriter": membership_writer.metrics.snapshot(),
+        "revokedTokens": len(denylist),
+        "logDropped": structured_logging.dropped,
+    }
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc):
     errors = []
@@ -0,0 +1,130 @@
+"""
+Bulk-load users, organisations and memberships from CSV or NDJSON files.
+
+    python -m app.seed --users users.csv --organisations orgs.ndjson \
+        --memberships memberships.csv
+
+Files are streamed in batches, so memory use does not grow with file size.
+On Postgres each batch is written with COPY; other databases use a batched
+executemany. Users take `password_hash` from the record when present and
+otherwise share one hash of `--password`, so bcrypt runs at most once.
+"""
+import argparse
+import asyncio
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+from uuid import uuid4
+
+from sqlalchemy import Table, insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.auth import get_password_hash
+from app.core.database import async_engine, create_tables
+from app.services.organisation.model import Organisation, OrganisationUser
+from app.services.user.model import User
+
+
+def read_records(path: Path) -> Iterator[dict]:
+    with path.open(newline="", encoding="utf-8") as file:
+        if path.suffix.lower() == ".csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batched(records: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(records)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def user_row(record: dict, shared_hash: str) -> dict:
+    return {
+        "userId": record.get("userId") or str(uuid4()),
+        "firstName": record["firstName"],
+        "lastName": record["lastName"],
+        "email": record["email"],
+        "password": record.get("password_hash") or shared_hash,
+        "phone": record.get("phone") or "",
+    }
+
+
+def organisation_row(record: dict) -> dict:
+    return {
+        "orgId": record.get("orgId") or str(uuid4()),
+        "name": record["name"],
+        "description": record.get("description") or None,
+    }
+
+
+def membership_row(record: dict) -> dict:
+    return {
+        "orgUserId": record.get("orgUserId") or str(uuid4()),
+        "userId": record["userId"],
+        "orgId": record["orgId"],
+        "role": record.get("role") or "member",
+    }
+
+
+async def write_batch(conn: AsyncConnection, table: Table, rows: list[dict]) -> None:
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        columns = list(rows[0])
+        await raw.driver_connection.copy_records_to_table(
+            table.name,
+            records=[tuple(row[column] for column in columns) for row in rows],
+            columns=columns,
+        )
+    else:
+        await conn.execute(insert(table), rows)
+        await conn.commit()
+
+
+async def load(table: Table, rows: Iterable[dict], batch_size: int) -> int:
+    total = 0
+    start = perf_counter()
+    async with async_engine.connect() as conn:
+        for batch in batched(rows, batch_size):
+            await write_batch(conn, table, batch)
+            total += len(batch)
+            elapsed = perf_counter() - start
+            print(f"{table.name}: {total} rows, {total / elapsed:.0f} rows/s", flush=True)
+    return total
+
+
+async def main(args: argparse.Namespace) -> None:
+    await create_tables()
+    if args.users:
+        shared_hash = get_password_hash(args.password)
+        rows = (user_row(record, shared_hash) for record in read_records(args.users))
+        await load(User.__table__, rows, args.batch_size)
+    if args.organisations:
+        rows = (organisation_row(record) for record in read_records(args.organisations))
+        await load(Organisation.__table__, rows, args.batch_size)
+    if args.memberships:
+        rows = (membership_row(record) for record in read_records(args.memberships))
+        await load(OrganisationUser.__table__, rows, args.batch_size)
+    await async_engine.dispose()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.seed",
+        description="Bulk-load users, organisations and memberships from CSV or NDJSON.",
+    )
+    parser.add_argument("--users", type=Path, help="users file (firstName, lastName, email, phone, optional userId/password_hash)")
+    parser.add_argument("--organisations", type=Path, help="organisations file (name, optional description/orgId)")
+    parser.add_argument("--memberships", type=Path, help="memberships file (userId, orgId, optional role)")
+    parser.add_argument("--password", default="password", help="plain password shared by users without a password_hash")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -1,6 +1,6 @@
 import enum
 from uuid import uuid4
-from sqlalchemy import String
+from sqlalchemy import Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -14,6 +14,15 @@ class Organisation(Base):
     orgId: Mapped[str] = mapped_column(
         String, primary_key=True, unique=True, default_factory=lambda: str(uuid4())
     )
+    # Bumped by the ORM on every update; used for ETags. create_all does not
+    # add columns to an existing table: run
+    # ALTER TABLE organisations ADD COLUMN version INTEGER NOT NULL DEFAULT 1
+    # on existing databases, or every select(Organisation) fails.
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
+
+    __mapper_args__ = {"version_id_col": version}
 
     def __repr__(self):
         return f"<Organisation {self.name}>"
@@ -28,5 +37,14 @@ class OrganisationUser(Base):
     )
     role: Mapped[str] = mapped_column(String, nullable=False, default="member")
 
+    __table_args__ = (
+        # Serves member listings (keyset on userId) and membership checks, and
+        # makes duplicate memberships raise IntegrityError. create_all does not
+        # add indexes to an existing table: remove duplicate memberships and
+        # create this index by hand on existing databases.
+        Index("ix_organisation_users_org_user", "orgId", "userId", unique=True),
+        Index("ix_organisation_users_user_org", "userId", "orgId"),
+    )
+
     def __repr__(self):
         return f"<OrganisationUser {self.userId} in {self.orgId}>"
@@ -1,17 +1,21 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Query, Response
 from fastapi.responses import JSONResponse
-from sqlalchemy import select
+from sqlalchemy import func, or_, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.audit import audit
 from app.core.auth import get_current_user, user_belongs_in_organisation
+from app.core.config import settings
 from app.core.database import async_get_db
+from app.core.etag import etag_matches, make_etag, not_modified
 from app.services.organisation.model import Organisation, OrganisationUser
-from app.services.organisation.schema import OrganisationCreate, OrganisationListResponse, OrganisationResponse, OrganisationUserCreate
+from app.services.organisation.schema import OrganisationCreate, OrganisationListResponse, OrganisationMemberListResponse, OrganisationResponse, OrganisationUserCreate
 from app.services.user.model import User
 from app.services.organisation.crud import org_handler
+from app.services.organisation.writer import membership_writer
 
 
 router = APIRouter(tags=["organisation"])
@@ -28,8 +32,14 @@ async def create_organisation(
     
     new_organisation = await org_handler.create(db, organisation)
     new_user_in_org = OrganisationUser(userId=user.userId, orgId=new_organisation.orgId)
-    db.add(new_user_in_org)
-    await db.commit()
+    if settings.MEMBERSHIP_WRITE_COALESCING:
+        # Give the connection back before waiting; the flush needs one too.
+        await db.close()
+        await membership_writer.add(new_user_in_org)
+    else:
+        db.add(new_user_in_org)
+        await db.commit()
+    audit("organisation.create", userId=user.userId, orgId=new_organisation.orgId)
     return {"status": "success", "message": "Organisation created successfully", "data": new_organisation}
 
 @router.get("/api/organisation/{orgId}", response_model=OrganisationResponse, status_code=200)
@@ -37,29 +47,95 @@ async def read_organisation(
     orgId: str,
     user: Annotated[User, Depends(get_current_user)],   
     db: Annotated[AsyncSession, Depends(async_get_db)],
-    can_view: Annotated[bool, Depends(user_belongs_in_organisation)]
+    can_view: Annotated[bool, Depends(user_belongs_in_organisation)],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     """
     Get organisation by ID
     """
     if not can_view:
         return JSONResponse({"status": "error", "message": "User does not belong to organisation", "statusCode": 401}, status_code=401)
+    version = (await db.execute(select(Organisation.version).filter(Organisation.orgId == orgId))).scalar()
+    etag = make_etag("organisation", orgId, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
     organisation = await org_handler.get(db, orgId=orgId)
+    response.headers["ETag"] = etag
     return {"status": "success", "message": "Organisation data retrieved successfully", "data": organisation}
 
 @router.get("/api/organisations", status_code=200, response_model=OrganisationListResponse)
 async def get_user_organisations(
     db: Annotated[AsyncSession, Depends(async_get_db)],
-    user: Annotated[User, Depends(get_current_user)]
+    user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     """
     Get all organisations
     """
-    user_orgs = (await db.execute(select(OrganisationUser).filter(OrganisationUser.userId == user.userId))).scalars().all()
-    org_ids = [org.orgId for org in user_orgs]
-    organisations = (await db.execute(select(Organisation).filter(Organisation.orgId.in_(org_ids)))).scalars().all()
+    user_orgs = (
+        select(Organisation)
+        .join(OrganisationUser, OrganisationUser.orgId == Organisation.orgId)
+        .filter(OrganisationUser.userId == user.userId)
+        .order_by(Organisation.orgId)
+    )
+    # Only the version columns are read to build the ETag.
+    versions = (await db.execute(user_orgs.with_only_columns(Organisation.orgId, Organisation.version))).all()
+    etag = make_etag("organisations", user.userId, *(f"{orgId}.{version}" for orgId, version in versions))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    organisations = (await db.execute(user_orgs)).scalars().all()
+    response.headers["ETag"] = etag
     return {"status": "success", "message": "Organisations data retrieved successfully", "data": {"organisations": organisations}}
 
+@router.get("/api/organisation/{orgId}/users", status_code=200, response_model=OrganisationMemberListResponse)
+async def list_organisation_users(
+    orgId: str,
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+    can_view: Annotated[bool, Depends(user_belongs_in_organisation)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    after: str | None = None,
+    search: Annotated[str | None, Query(max_length=100)] = None,
+):
+    """
+    List organisation members with their role, paginated by userId
+    """
+    if not can_view:
+        return JSONResponse({"status": "error", "message": "User does not belong to organisation", "statusCode": 401}, status_code=401)
+    query = (
+        select(User, OrganisationUser.role)
+        .join(OrganisationUser, OrganisationUser.userId == User.userId)
+        .filter(OrganisationUser.orgId == orgId)
+        .order_by(OrganisationUser.userId)
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.filter(OrganisationUser.userId > after)
+    if search:
+        prefix = search.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        query = query.filter(
+            or_(
+                func.lower(User.email).like(prefix, escape="\\"),
+                func.lower(User.firstName).like(prefix, escape="\\"),
+                func.lower(User.lastName).like(prefix, escape="\\"),
+            )
+        )
+    rows = (await db.execute(query)).all()
+    next_cursor = rows[limit - 1][0].userId if len(rows) > limit else None
+    members = [
+        {
+            "userId": member.userId,
+            "firstName": member.firstName,
+            "lastName": member.lastName,
+            "email": member.email,
+            "phone": member.phone,
+            "role": role,
+        }
+        for member, role in rows[:limit]
+    ]
+    return {"status": "success", "message": "Organisation members retrieved successfully", "data": {"users": members, "nextCursor": next_cursor}}
+
 @router.post("/api/organisation/{orgId}/users", status_code=200)
 async def add_user_to_organisation(
     orgId: str,
@@ -70,10 +146,26 @@ async def add_user_to_organisation(
     """
     Add a user to an organisation
     """
-    try:
-        new_user_in_org = OrganisationUser(userId=user.userId, orgId=orgId)
-        db.add(new_user_in_org)
-        await db.commit()
-    except IntegrityError:
+    new_user_in_org = OrganisationUser(userId=user.userId, orgId=orgId)
+    if settings.MEMBERSHIP_WRITE_COALESCING:
+        # get_current_user's query checked out a connection; give it back
+        # before waiting, as the flush needs one from the same pool.
+        await db.close()
+        added = await membership_writer.add(new_user_in_org)
+    else:
+        try:
+            db.add(new_user_in_org)
+            await db.commit()
+            added = True
+        except IntegrityError:
+            added = False
+    audit(
+        "organisation.member_add",
+        outcome="success" if added else "conflict",
+        actorId=current_user.userId,
+        userId=user.userId,
+        orgId=orgId,
+    )
+    if not added:
         return JSONResponse({"status": "error", "message": "User already exists in organisation", "statusCode": 400}, status_code=400)
     return {"status": "success", "message": "User added to organisation successfully"}
\ No newline at end of file
@@ -6,6 +6,7 @@ from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 from app.core.schema import BaseRespone
 from app.services.organisation.model import Organisation
+from app.services.user.schema import UserRead
 
 
 class OrganisationBase(BaseModel):
@@ -40,3 +41,18 @@ class OrganisationListResponse(BaseRespone):
     status: str = "success"
     message: str = "Organisations data retrieved successfully"
     data: OrganisationList
+
+
+class OrganisationMember(UserRead):
+    role: str
+
+
+class OrganisationMemberList(BaseModel):
+    users: list[OrganisationMember]
+    nextCursor: str | None = None
+
+
+class OrganisationMemberListResponse(BaseRespone):
+    status: str = "success"
+    message: str = "Organisation members retrieved successfully"
+    data: OrganisationMemberList
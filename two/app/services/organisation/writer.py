@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from time import perf_counter
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import local_session
+from app.services.organisation.model import OrganisationUser
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CoalescerMetrics:
+    flushes: int = 0
+    rows: int = 0
+    conflicts: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    last_flush_seconds: float = 0.0
+    max_flush_seconds: float = 0.0
+    total_flush_seconds: float = 0.0
+
+    def record(self, batch_size: int, conflicts: int, seconds: float) -> None:
+        self.flushes += 1
+        self.rows += batch_size
+        self.conflicts += conflicts
+        self.last_batch_size = batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.last_flush_seconds = seconds
+        self.max_flush_seconds = max(self.max_flush_seconds, seconds)
+        self.total_flush_seconds += seconds
+
+    def snapshot(self) -> dict:
+        return {
+            "flushes": self.flushes,
+            "rows": self.rows,
+            "conflicts": self.conflicts,
+            "lastBatchSize": self.last_batch_size,
+            "maxBatchSize": self.max_batch_size,
+            "lastFlushSeconds": self.last_flush_seconds,
+            "maxFlushSeconds": self.max_flush_seconds,
+            "totalFlushSeconds": self.total_flush_seconds,
+        }
+
+
+class MembershipWriteCoalescer:
+    """
+    Batch `OrganisationUser` inserts from concurrent requests.
+
+    Inserts queued within `window_ms` of each other, or until `max_batch`
+    are queued, are written as one multi-row INSERT in a single transaction.
+    Each caller gets back True if its row was inserted or False if the
+    membership already existed.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = local_session,
+        window_ms: float = settings.MEMBERSHIP_COALESCE_WINDOW_MS,
+        max_batch: int = settings.MEMBERSHIP_COALESCE_MAX_BATCH,
+    ):
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.metrics = CoalescerMetrics()
+        self._pending: list[tuple[OrganisationUser, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def add(self, membership: OrganisationUser) -> bool:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((membership, future))
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.window, self._start_flush
+            )
+        return await future
+
+    async def close(self) -> None:
+        """Flush anything still queued and wait for in-flight batches."""
+        if self._pending:
+            self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list[tuple[OrganisationUser, asyncio.Future]]) -> None:
+        start = perf_counter()
+        try:
+            results = await self._write([membership for membership, _ in batch])
+        except Exception as exc:
+            logger.exception("Failed to flush %d organisation memberships", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        elapsed = perf_counter() - start
+        self.metrics.record(len(batch), results.count(False), elapsed)
+        logger.debug("Flushed %d organisation memberships in %.3fs", len(batch), elapsed)
+        for (_, future), inserted in zip(batch, results):
+            if not future.done():
+                future.set_result(inserted)
+
+    async def _write(self, memberships: list[OrganisationUser]) -> list[bool]:
+        results = [False] * len(memberships)
+        candidates: dict[tuple[str, str], int] = {}
+        for i, membership in enumerate(memberships):
+            # Later duplicates within the batch conflict with the first one.
+            candidates.setdefault((membership.orgId, membership.userId), i)
+
+        async with self.session_factory() as db:
+            existing = (
+                await db.execute(
+                    select(OrganisationUser.orgId, OrganisationUser.userId)
+                    .filter(OrganisationUser.orgId.in_({org for org, _ in candidates}))
+                    .filter(OrganisationUser.userId.in_({user for _, user in candidates}))
+                )
+            ).all()
+            for key in existing:
+                candidates.pop(tuple(key), None)
+            if not candidates:
+                return results
+
+            rows = [self._values(memberships[i]) for i in candidates.values()]
+            try:
+                await db.execute(insert(OrganisationUser).values(rows))
+                await db.commit()
+            except IntegrityError:
+                # Raced with a writer outside this batch; fall back to
+                # row-at-a-time so only the conflicting callers see it.
+                await db.rollback()
+                for i in candidates.values():
+                    try:
+                        await db.execute(
+                            insert(OrganisationUser).values(self._values(memberships[i]))
+                        )
+                        await db.commit()
+                    except IntegrityError:
+                        await db.rollback()
+                    else:
+                        results[i] = True
+                return results
+
+        for i in candidates.values():
+            results[i] = True
+        return results
+
+    @staticmethod
+    def _values(membership: OrganisationUser) -> dict[str, str]:
+        return {
+            "orgUserId": membership.orgUserId,
+            "userId": membership.userId,
+            "orgId": membership.orgId,
+            "role": membership.role,
+        }
+
+
+membership_writer = MembershipWriteCoalescer()
@@ -1,4 +1,6 @@
-from sqlalchemy import String
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 from uuid import uuid4
 from app.core.database import Base
@@ -13,8 +15,65 @@ class User(Base):
     password: Mapped[str] = mapped_column(String, nullable=False)
     phone: Mapped[str] = mapped_column(String)
     userId: Mapped[str] = mapped_column(
-        String, primary_key=True, unique=True, default=str(uuid4())
+        String, primary_key=True, unique=True, default_factory=lambda: str(uuid4())
+    )
+    # Bumped by the ORM on every update; used for ETags. create_all does not
+    # add columns to an existing table: run
+    # ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 1
+    # on existing databases, or every select(User) fails.
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
+    __table_args__ = (
+        # Case-insensitive prefix search for organisation member listings.
+        Index(
+            "ix_users_lower_email",
+            func.lower(email).label("lower_email"),
+            postgresql_ops={"lower_email": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_users_lower_first_name",
+            func.lower(firstName).label("lower_first_name"),
+            postgresql_ops={"lower_first_name": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_users_lower_last_name",
+            func.lower(lastName).label("lower_last_name"),
+            postgresql_ops={"lower_last_name": "text_pattern_ops"},
+        ),
     )
 
     def __repr__(self):
         return f"<User {self.email}>"
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # Either a token `jti`, or `user:<userId>` to revoke every token issued
+    # to that user before `revokedAt`. Revoking again adds a new row.
+    jti: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    userId: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    expiresAt: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    revokedAt: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        default_factory=lambda: datetime.now(UTC).replace(tzinfo=None),
+    )
+    # Assigned by the database; workers refresh incrementally from the
+    # highest id they have seen, independent of any host's clock.
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=True, init=False
+    )
+
+    # Without AUTOINCREMENT, SQLite reuses the id of a purged newest row.
+    # create_all does not alter existing tables: a revoked_tokens table from
+    # before the id column only holds short-lived rows and can be dropped so
+    # it is recreated on startup.
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti}>"
@@ -2,10 +2,11 @@ import logging
 from datetime import timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import text
+from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import (
@@ -14,14 +15,22 @@ from app.core.auth import (
     create_access_token,
     get_current_user,
     get_password_hash,
+    get_token_payload,
+    revoke_token,
+    revoke_user_tokens,
     user_shares_organisation,
+    visible_user_ids,
 )
+from app.core.audit import audit
 from app.core.database import async_get_db
+from app.core.etag import etag_matches, make_etag, not_modified
 from app.services.organisation.model import Organisation, OrganisationUser
 from app.services.user.model import User
 from app.services.user.schema import (
     AuthResponse,
     LoginSchema,
+    UserBatchRequest,
+    UserBatchResponse,
     UserCreate,
     UserRead,
     UserResponse,
@@ -42,6 +51,7 @@ async def register(
 
     user_in_db = await user_handler.exists(db, email=user.email)
     if user_in_db:
+        audit("auth.register", outcome="failure", reason="email_exists", email=user.email)
         return JSONResponse(
             {
                 "status": "Bad request",
@@ -51,7 +61,7 @@ async def register(
             400,
         )
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await run_in_threadpool(get_password_hash, user.password)
     new_user = User(
         firstName=user.firstName,
         lastName=user.lastName,
@@ -74,6 +84,7 @@ async def register(
     )
     db.add(user_org)
     await db.commit()
+    audit("auth.register", outcome="success", userId=new_user.userId, orgId=new_org.orgId)
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = await create_access_token(
@@ -95,6 +106,7 @@ async def login(
 ):
     user = await authenticate_user(form_data.email, form_data.password, db)
     if not user:
+        audit("auth.login", outcome="failure", email=form_data.email)
         return JSONResponse(
             {
                 "status": "Bad request",
@@ -108,6 +120,7 @@ async def login(
         data={"email": user.email, "sub": user.userId},
         expires_delta=access_token_expires,
     )
+    audit("auth.login", outcome="success", userId=user.userId)
     return {
         "message": "Login successful",
         "status": "success",
@@ -122,6 +135,7 @@ async def login_for_access_token(
 ):
     user = await authenticate_user(form_data.username, form_data.password, db)
     if not user:
+        audit("auth.token", outcome="failure", email=form_data.username)
         raise HTTPException(
             status_code=401,
             detail="Incorrect email or password",
@@ -132,13 +146,40 @@ async def login_for_access_token(
         data={"email": user.email, "sub": user.userId},
         expires_delta=access_token_expires,
     )
+    audit("auth.token", outcome="success", userId=user.userId)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/auth/logout", status_code=200)
+async def logout(
+    payload: Annotated[dict, Depends(get_token_payload)],
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+):
+    await revoke_token(payload, db)
+    audit("auth.logout", userId=payload.get("sub"), jti=payload.get("jti"))
+    return {"status": "success", "message": "Logout successful"}
+
+
+@router.post("/auth/logout/all", status_code=200)
+async def logout_all_sessions(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+):
+    await revoke_user_tokens(current_user.userId, db)
+    audit("auth.logout_all", userId=current_user.userId)
+    return {"status": "success", "message": "All sessions revoked successfully"}
+
+
 @router.get("/api/user", response_model=UserResponse, status_code=200)
 async def get_user(
     current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
+    etag = make_etag("user", current_user.userId, current_user.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return {
         "message": "User details fetched successfully",
         "status": "success",
@@ -151,10 +192,17 @@ async def get_user_by_id(
     userId: str,
     db: Annotated[AsyncSession, Depends(async_get_db)],
     can_view: Annotated[bool, Depends(user_shares_organisation)],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     # only fetch the user details to user who share organisation with the current user
-    user = await user_handler.get(db, userId=userId)
     if can_view:
+        version = (await db.execute(select(User.version).filter(User.userId == userId))).scalar()
+        etag = make_etag("user", userId, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        user = await user_handler.get(db, userId=userId)
+        response.headers["ETag"] = etag
         return {
             "message": "User details fetched successfully",
             "status": "success",
@@ -169,3 +217,31 @@ async def get_user_by_id(
     )
 
 
+@router.post("/api/users/batch", response_model=UserBatchResponse, status_code=200)
+async def get_users_batch(
+    batch: UserBatchRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(async_get_db)],
+):
+    # one membership query for visibility, one IN query for the visible users
+    userIds = list(dict.fromkeys(batch.userIds))
+    visible = await visible_user_ids(db, current_user, userIds)
+    users = {}
+    if visible:
+        users = {
+            user.userId: user
+            for user in (
+                await db.execute(select(User).filter(User.userId.in_(visible)))
+            ).scalars().all()
+        }
+    return {
+        "message": "Users retrieved successfully",
+        "status": "success",
+        "data": {
+            "found": [users[userId] for userId in userIds if userId in users],
+            "forbidden": [userId for userId in userIds if userId not in visible],
+            "missing": [
+                userId for userId in userIds if userId in visible and userId not in users
+            ],
+        },
+    }
@@ -5,6 +5,7 @@ from typing import Annotated
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
+from app.core.config import settings
 from app.core.schema import BaseRespone
 from app.services.user.model import User
 
@@ -42,4 +43,22 @@ class AuthResponse(BaseRespone):
 class UserResponse(BaseRespone):
     status: str = "success"
     message: str = "User data retrieved successfully"
-    data: UserRead
\ No newline at end of file
+    data: UserRead
+
+
+class UserBatchRequest(BaseModel):
+    userIds: Annotated[
+        list[str], Field(min_length=1, max_length=settings.USER_BATCH_MAX_IDS)
+    ]
+
+
+class UserBatch(BaseModel):
+    found: list[UserRead]
+    forbidden: list[str]
+    missing: list[str]
+
+
+class UserBatchResponse(BaseRespone):
+    status: str = "success"
+    message: str = "Users retrieved successfully"
+    data: UserBatch
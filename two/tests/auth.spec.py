@@ -1,11 +1,27 @@
+import asyncio
+import io
+import json
+import logging
+import queue
+import time
+from datetime import UTC, datetime, timedelta
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy import text
 from app.core.config import settings
+from app.core.audit import BatchingLogWriter, DroppingQueueHandler, JsonFormatter
+from app.core.denylist import TokenDenylist
+from app.core.admission import AdmissionController, Overloaded, RouteClass, classify
 from app.main import app
+from app.seed import main as seed_main, parse_args as seed_args
 from app.core.database import Base, async_get_db
+from app.services.organisation.model import OrganisationUser
+from app.services.user.model import RevokedToken
+from app.services.organisation.writer import MembershipWriteCoalescer
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # Test database URL
 TEST_DATABASE_URL = settings.DATABASE_URI
@@ -158,3 +174,455 @@ async def test_register_fails_with_duplicate_email(test_app):
     )
 
     assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_logout_revokes_token(test_app, clear_db):
+    response = await test_app.post(
+        "/auth/register",
+        json={
+            "firstName": "Logout",
+            "lastName": "User",
+            "email": "logout@example.com",
+            "password": "securepassword",
+            "phone": "1234567890",
+        },
+    )
+    headers = {"Authorization": f"Bearer {response.json()['data']['accessToken']}"}
+
+    assert (await test_app.get("/api/user", headers=headers)).status_code == 200
+    assert (await test_app.post("/auth/logout", headers=headers)).status_code == 200
+    assert (await test_app.get("/api/user", headers=headers)).status_code == 401
+
+
+@pytest.mark.anyio
+async def test_logout_all_revokes_every_session(test_app, clear_db):
+    response = await test_app.post(
+        "/auth/register",
+        json={
+            "firstName": "Many",
+            "lastName": "Sessions",
+            "email": "sessions@example.com",
+            "password": "securepassword",
+            "phone": "1234567890",
+        },
+    )
+    first = {"Authorization": f"Bearer {response.json()['data']['accessToken']}"}
+    response = await test_app.post(
+        "/auth/login",
+        json={"email": "sessions@example.com", "password": "securepassword"},
+    )
+    second = {"Authorization": f"Bearer {response.json()['data']['accessToken']}"}
+
+    assert (await test_app.post("/auth/logout/all", headers=first)).status_code == 200
+    assert (await test_app.get("/api/user", headers=first)).status_code == 401
+    assert (await test_app.get("/api/user", headers=second)).status_code == 401
+
+    response = await test_app.post(
+        "/auth/login",
+        json={"email": "sessions@example.com", "password": "securepassword"},
+    )
+    fresh = {"Authorization": f"Bearer {response.json()['data']['accessToken']}"}
+    assert (await test_app.get("/api/user", headers=fresh)).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_list_organisation_users(test_app, clear_db):
+    tokens = {}
+    for first_name in ["Owner", "Bella"]:
+        response = await test_app.post(
+            "/auth/register",
+            json={
+                "firstName": first_name,
+                "lastName": "Member",
+                "email": f"{first_name.lower()}@example.com",
+                "password": "securepassword",
+                "phone": "1234567890",
+            },
+        )
+        tokens[first_name] = response.json()["data"]
+    headers = {"Authorization": f"Bearer {tokens['Owner']['accessToken']}"}
+    org_id = (await test_app.get("/api/organisations", headers=headers)).json()[
+        "data"
+    ]["organisations"][0]["orgId"]
+    await test_app.post(
+        f"/api/organisation/{org_id}/users",
+        json={"userId": tokens["Bella"]["user"]["userId"]},
+        headers=headers,
+    )
+
+    response = await test_app.get(f"/api/organisation/{org_id}/users", headers=headers)
+    assert response.status_code == 200
+    members = {m["email"]: m["role"] for m in response.json()["data"]["users"]}
+    assert members == {"owner@example.com": "admin", "bella@example.com": "member"}
+
+    response = await test_app.get(
+        f"/api/organisation/{org_id}/users", params={"search": "BEL"}, headers=headers
+    )
+    assert [m["firstName"] for m in response.json()["data"]["users"]] == ["Bella"]
+
+    page = (
+        await test_app.get(
+            f"/api/organisation/{org_id}/users", params={"limit": 1}, headers=headers
+        )
+    ).json()["data"]
+    assert len(page["users"]) == 1 and page["nextCursor"] is not None
+    page = (
+        await test_app.get(
+            f"/api/organisation/{org_id}/users",
+            params={"limit": 1, "after": page["nextCursor"]},
+            headers=headers,
+        )
+    ).json()["data"]
+    assert len(page["users"]) == 1 and page["nextCursor"] is None
+
+    outsider = {"Authorization": f"Bearer {tokens['Bella']['accessToken']}"}
+    bella_org = (await test_app.get("/api/organisations", headers=outsider)).json()[
+        "data"
+    ]["organisations"]
+    own_org = next(o["orgId"] for o in bella_org if o["orgId"] != org_id)
+    response = await test_app.get(f"/api/organisation/{own_org}/users", headers=headers)
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_membership_writes_are_coalesced(test_app, clear_db):
+    writer = MembershipWriteCoalescer(test_session, window_ms=20, max_batch=10)
+    results = await asyncio.gather(
+        writer.add(OrganisationUser(userId="u1", orgId="org")),
+        writer.add(OrganisationUser(userId="u2", orgId="org")),
+        writer.add(OrganisationUser(userId="u1", orgId="org")),
+    )
+    assert results == [True, True, False]
+    assert writer.metrics.flushes == 1
+    assert writer.metrics.last_batch_size == 3
+
+    assert await writer.add(OrganisationUser(userId="u2", orgId="org")) is False
+    assert writer.metrics.flushes == 2
+
+
+@pytest.mark.anyio
+async def test_admission_sheds_and_prioritises_reads():
+    controller = AdmissionController(
+        [RouteClass("read", 1, 1, 1.0), RouteClass("write", 1, 1, 0.05)],
+        total_limit=1,
+    )
+    await controller.acquire("write")
+
+    queued_write = asyncio.create_task(controller.acquire("write"))
+    queued_read = asyncio.create_task(controller.acquire("read"))
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded):
+        await controller.acquire("read")
+    assert controller.classes["read"].shed_queue_full == 1
+
+    controller.release("write")
+    await queued_read
+    with pytest.raises(Overloaded):
+        await queued_write
+    assert controller.snapshot()["classes"]["write"]["shedTimeout"] == 1
+
+    # A slot handed over right at the waiter's deadline must not leak.
+    controller.release("read")
+    await controller.acquire("write")
+    queued_write = asyncio.create_task(controller.acquire("write"))
+    await asyncio.sleep(0)
+    # Block past both timers so the release and the deadline fire in one tick.
+    asyncio.get_running_loop().call_later(0.04, controller.release, "write")
+    time.sleep(0.06)
+    try:
+        await queued_write
+    except Overloaded:
+        pass
+    else:
+        controller.release("write")
+    assert controller.in_flight == 0
+    assert controller.classes["write"].in_flight == 0
+
+
+def test_admission_classifies_routes():
+    assert classify("POST", "/auth/login") == "auth"
+    assert classify("GET", "/api/organisations") == "read"
+    assert classify("POST", "/api/users/batch") == "read"
+    assert classify("POST", "/api/organisations") == "write"
+
+
+@pytest.mark.anyio
+async def test_seed_imports_users_organisations_and_memberships(
+    test_app, clear_db, tmp_path
+):
+    (tmp_path / "users.csv").write_text(
+        "userId,firstName,lastName,email,phone\n"
+        "seed-1,Ada,Seed,ada@example.com,123\n"
+        "seed-2,Bob,Seed,bob@example.com,456\n"
+    )
+    (tmp_path / "orgs.ndjson").write_text('{"orgId": "org-1", "name": "Seeded"}\n')
+    (tmp_path / "members.ndjson").write_text(
+        '{"userId": "seed-1", "orgId": "org-1", "role": "admin"}\n'
+        '{"userId": "seed-2", "orgId": "org-1"}\n'
+    )
+
+    await seed_main(
+        seed_args(
+            [
+                "--users", str(tmp_path / "users.csv"),
+                "--organisations", str(tmp_path / "orgs.ndjson"),
+                "--memberships", str(tmp_path / "members.ndjson"),
+                "--password", "seeded",
+                "--batch-size", "1",
+            ]
+        )
+    )
+
+    response = await test_app.post(
+        "/auth/login", json={"email": "ada@example.com", "password": "seeded"}
+    )
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['data']['accessToken']}"}
+    response = await test_app.get("/api/organisation/org-1/users", headers=headers)
+    members = {m["userId"]: m["role"] for m in response.json()["data"]["users"]}
+    assert members == {"seed-1": "admin", "seed-2": "member"}
+
+
+def test_structured_logging_batches_and_drops_on_overflow():
+    log_queue = queue.Queue(maxsize=2)
+    handler = DroppingQueueHandler(log_queue)
+    logger = logging.getLogger("tests.audit")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    for i in range(3):
+        logger.info("auth.login", extra={"fields": {"event": "auth.login", "n": i}})
+    logger.removeHandler(handler)
+    assert handler.dropped == 1
+
+    stream = io.StringIO()
+    writer = BatchingLogWriter(log_queue, stream, JsonFormatter(), batch_size=10)
+    writer.start()
+    writer.stop()
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["n"] for line in lines] == [0, 1]
+    assert lines[0]["event"] == "auth.login"
+
+
+@pytest.mark.anyio
+async def test_conditional_get_returns_not_modified(test_app, clear_db):
+    response = await test_app.post(
+        "/auth/register",
+        json={
+            "firstName": "Etag",
+            "lastName": "User",
+            "email": "etag@example.com",
+            "password": "securepassword",
+            "phone": "1234567890",
+        },
+    )
+    headers = {"Authorization": f"Bearer {response.json()['data']['accessToken']}"}
+
+    response = await test_app.get("/api/user", headers=headers)
+    etag = response.headers["ETag"]
+    response = await test_app.get("/api/user", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = await test_app.get("/api/organisations", headers=headers)
+    etag = response.headers["ETag"]
+    org_id = response.json()["data"]["organisations"][0]["orgId"]
+    response = await test_app.get(
+        "/api/organisations", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    response = await test_app.get(f"/api/organisation/{org_id}", headers=headers)
+    response = await test_app.get(
+        f"/api/organisation/{org_id}",
+        headers={**headers, "If-None-Match": f"W/{response.headers['ETag']}"},
+    )
+    assert response.status_code == 304
+
+    await test_app.post("/api/organisations", json={"name": "Second"}, headers=headers)
+    response = await test_app.get(
+        "/api/organisations", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["data"]["organisations"]) == 2
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.anyio
+async def test_batch_user_lookup(test_app, clear_db):
+    tokens = {}
+    for first_name in ["Anna", "Ben", "Cara"]:
+        response = await test_app.post(
+            "/auth/register",
+            json={
+                "firstName": first_name,
+                "lastName": "Batch",
+                "email": f"{first_name.lower()}@example.com",
+                "password": "securepassword",
+                "phone": "1234567890",
+            },
+        )
+        tokens[first_name] = response.json()["data"]
+    ids = {name: data["user"]["userId"] for name, data in tokens.items()}
+    headers = {"Authorization": f"Bearer {tokens['Anna']['accessToken']}"}
+    org_id = (await test_app.get("/api/organisations", headers=headers)).json()[
+        "data"
+    ]["organisations"][0]["orgId"]
+    for userId in [ids["Ben"], "ghost"]:
+        await test_app.post(
+            f"/api/organisation/{org_id}/users", json={"userId": userId}, headers=headers
+        )
+
+    response = await test_app.post(
+        "/api/users/batch",
+        json={"userIds": [ids["Anna"], ids["Ben"], ids["Cara"], "ghost", "nobody"]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [user["firstName"] for user in data["found"]] == ["Anna", "Ben"]
+    assert data["forbidden"] == [ids["Cara"], "nobody"]
+    assert data["missing"] == ["ghost"]
+
+    response = await test_app.post(
+        "/api/users/batch",
+        json={"userIds": [str(i) for i in range(settings.USER_BATCH_MAX_IDS + 1)]},
+        headers=headers,
+    )
+    assert response.status_code == 422
+
+
+def _revoked(jti, revoked_at_offset=0, expires_offset=600, **kwargs):
+    now = datetime.now(UTC).replace(tzinfo=None)
+    return RevokedToken(
+        jti=jti,
+        userId="u",
+        revokedAt=now + timedelta(seconds=revoked_at_offset),
+        expiresAt=now + timedelta(seconds=expires_offset),
+        **kwargs,
+    )
+
+
+@pytest.mark.anyio
+async def test_denylist_refreshes_incrementally_by_id(test_app):
+    mirror = TokenDenylist(capacity=4)
+    async with test_session() as db:
+        await db.execute(text("DELETE FROM revoked_tokens"))
+        db.add(_revoked("first"))
+        await db.commit()
+        await mirror.refresh(db)
+        assert mirror.is_revoked("first", "u", None)
+
+        # A host with a slow clock still lands above the id cursor.
+        db.add(_revoked("slow-host", revoked_at_offset=-15))
+        await db.commit()
+        await mirror.refresh(db)
+        assert mirror.is_revoked("slow-host", "u", None)
+        assert not mirror.is_revoked("never", "u", None)
+
+
+@pytest.mark.anyio
+async def test_denylist_rechecks_ids_committed_late(test_app):
+    mirror = TokenDenylist(capacity=4)
+    async with test_session() as db:
+        await db.execute(text("DELETE FROM revoked_tokens"))
+        anchor = _revoked("anchor")
+        db.add(anchor)
+        await db.commit()
+        await mirror.refresh(db)
+
+        # id + 2 commits first, then id + 1 commits after the cursor moved past it.
+        early = _revoked("early")
+        early.id = anchor.id + 2
+        db.add(early)
+        await db.commit()
+        await mirror.refresh(db)
+        late = _revoked("late")
+        late.id = anchor.id + 1
+        db.add(late)
+        await db.commit()
+        await mirror.refresh(db)
+        assert mirror.is_revoked("late", "u", None)
+
+
+@pytest.mark.anyio
+async def test_denylist_expires_entries(test_app):
+    mirror = TokenDenylist(capacity=4)
+    async with test_session() as db:
+        await db.execute(text("DELETE FROM revoked_tokens"))
+        db.add(_revoked("expired", expires_offset=-1))
+        db.add(_revoked("live"))
+        await db.commit()
+        await mirror.refresh(db)
+        remaining = (await db.execute(text("SELECT jti FROM revoked_tokens"))).scalars().all()
+    assert remaining == ["live"]
+    assert not mirror.is_revoked("expired", "u", None)
+
+    now = datetime.now(UTC).replace(tzinfo=None)
+    mirror.add("soon", now, now + timedelta(milliseconds=50))
+    assert mirror.is_revoked("soon", "u", None)
+    time.sleep(0.06)
+    assert not mirror.is_revoked("soon", "u", None)
+    mirror.prune()
+    assert len(mirror) == 1
+
+
+@pytest.mark.anyio
+async def test_coalesced_writes_do_not_starve_the_pool(test_app, clear_db, monkeypatch):
+    response = await test_app.post(
+        "/auth/register",
+        json={
+            "firstName": "Pool",
+            "lastName": "Owner",
+            "email": "pool@example.com",
+            "password": "securepassword",
+            "phone": "1234567890",
+        },
+    )
+    headers = {"Authorization": f"Bearer {response.json()['data']['accessToken']}"}
+    org_id = (await test_app.get("/api/organisations", headers=headers)).json()[
+        "data"
+    ]["organisations"][0]["orgId"]
+
+    # Fewer connections than concurrent requests, and no overflow.
+    small_engine = create_async_engine(
+        TEST_DATABASE_URL,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=2,
+        max_overflow=0,
+        pool_timeout=2,
+    )
+    small_session = sessionmaker(
+        bind=small_engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async def small_get_db():
+        async with small_session() as session:
+            yield session
+
+    writer = MembershipWriteCoalescer(small_session, window_ms=20, max_batch=10)
+    monkeypatch.setattr(settings, "MEMBERSHIP_WRITE_COALESCING", True)
+    monkeypatch.setattr("app.services.organisation.route.membership_writer", writer)
+    previous_get_db = app.dependency_overrides[async_get_db]
+    app.dependency_overrides[async_get_db] = small_get_db
+    try:
+        responses = await asyncio.wait_for(
+            asyncio.gather(
+                *(
+                    test_app.post(
+                        f"/api/organisation/{org_id}/users",
+                        json={"userId": f"pool-member-{i}"},
+                        headers=headers,
+                    )
+                    for i in range(5)
+                )
+            ),
+            timeout=10,
+        )
+    finally:
+        app.dependency_overrides[async_get_db] = previous_get_db
+        await small_engine.dispose()
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert writer.metrics.rows == 5